@@ -1,6 +1,7 @@
 import numpy as np
 import os
 import json
+from ai.sketch import build_duration_sketches
 
 def calculate_weakness_scores(history):
     """
@@ -93,35 +94,52 @@ def calculate_weakness_scores(history):
 
     return results
 
-def recommend_time_range(history):
+def recommend_time_range(history, sketches=None, cohort=False):
     """
     Predicts a range with rationale and confidence.
+    Uses p25-p75 of completed sessions and a low percentile of failed ones,
+    read from per-user duration sketches (built from history if not given).
+    With cohort=True the sketches are a merged cohort baseline.
     """
-    if not history:
+    if sketches is None:
+        sketches = build_duration_sketches(history or [])
+
+    sessions, failures = sketches["sessions"], sketches["failures"]
+    if sessions.count == 0 and failures.count == 0:
         return {
             "range": [45, 90],
             "rationale": "Initial baseline for a balanced start.",
             "confidence": "Low"
         }
-        
-    history_times = [d.get('minutes', 0) for d in history if d.get('minutes', 0) > 0]
-    base_time = np.mean(history_times) if history_times else 60
-    
-    # Simple fatigue wall logic (approximate)
-    fail_points = [d.get('minutes', 30) for d in history if not d.get('completed')]
-    fatigue_wall = np.mean(fail_points) * 0.9 if fail_points else base_time * 1.5
-    
-    rec_min = max(30, int(base_time * 0.8))
-    rec_max = min(int(fatigue_wall), int(base_time * 1.3))
-    
-    rationale = f"Aligned with your {int(base_time)}m average focus time. "
-    if fail_points:
-        rationale += "Capped to avoid your historic 'fatigue wall'. "
-    
+
+    if sessions.count:
+        low, median, high = (sessions.quantile(q) for q in (0.25, 0.5, 0.75))
+    else:
+        low, median, high = 48, 60, 78
+
+    # Fatigue wall: most failures happen beyond this point
+    fatigue_wall = failures.quantile(0.2) if failures.count else high * 1.5
+
+    rec_min = max(30, int(low))
+    rec_max = max(rec_min, min(int(fatigue_wall), int(high)))
+
+    owner = "the cohort's" if cohort else "your"
+    if sessions.count:
+        rationale = f"Aligned with {owner} typical {int(low)}-{int(high)}m focus window (median {int(median)}m). "
+    else:
+        rationale = "Starting from a default 60m focus window. "
+    if failures.count:
+        rationale += f"Capped to avoid {owner} historic 'fatigue wall'. "
+
+    if cohort:
+        confidence = "Low"
+    else:
+        confidence = "High" if sessions.count + failures.count >= 5 else "Medium"
+
     return {
         "range": [rec_min, rec_max],
         "rationale": rationale.strip(),
-        "confidence": "High" if len(history) >= 5 else "Medium"
+        "confidence": confidence
     }
 
 def calculate_dropout_risk(history, streak):
@@ -0,0 +1,113 @@
+import random
+
+class QuantileSketch:
+    """
+    KLL-style streaming quantile sketch.
+
+    Values are appended to a level-0 buffer in O(1); when a level overflows it is
+    sorted and every other item is promoted to the next level with double weight.
+    Memory stays around 3k items no matter how many values are added, and two
+    sketches merge by concatenating their levels and compacting again.
+    """
+
+    def __init__(self, k=128):
+        self.k = k
+        self.count = 0
+        self.levels = [[]]
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(self.k * (2 / 3) ** depth))
+
+    def _size(self):
+        return sum(len(items) for items in self.levels)
+
+    def _max_size(self):
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compress(self):
+        while self._size() > self._max_size():
+            for h, items in enumerate(self.levels):
+                if len(items) >= self._capacity(h):
+                    if h + 1 == len(self.levels):
+                        self.levels.append([])
+                    items.sort()
+                    # An odd item out stays behind so total weight is preserved
+                    keep = [items.pop()] if len(items) % 2 else []
+                    offset = random.randint(0, 1)
+                    self.levels[h + 1].extend(items[offset::2])
+                    self.levels[h] = keep
+                    break
+
+    def add(self, value):
+        self.levels[0].append(float(value))
+        self.count += 1
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, items in enumerate(other.levels):
+            self.levels[h].extend(items)
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """
+        Approximate value at rank q (0..1). Returns None for an empty sketch.
+        """
+        weighted = sorted(
+            (value, 2 ** h) for h, items in enumerate(self.levels) for value in items
+        )
+        if not weighted:
+            return None
+        total = sum(w for _, w in weighted)
+        target = q * total
+        running = 0
+        for value, w in weighted:
+            running += w
+            if running >= target:
+                return value
+        return weighted[-1][0]
+
+    def to_dict(self):
+        return {"k": self.k, "count": self.count, "levels": self.levels}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data.get("k", 128))
+        sketch.count = data.get("count", 0)
+        sketch.levels = [list(items) for items in data.get("levels", [[]])] or [[]]
+        return sketch
+
+def build_duration_sketches(history, sketches=None):
+    """
+    Folds sessions into {"sessions", "failures"} duration sketches.
+    Completed sessions feed the focus window, skipped ones the fatigue wall.
+    Sessions with no recorded time say nothing about either and are skipped.
+    """
+    if sketches is None:
+        sketches = {"sessions": QuantileSketch(), "failures": QuantileSketch()}
+    for d in history:
+        if d.get('completed'):
+            if d.get('minutes', 0) > 0:
+                sketches["sessions"].add(d['minutes'])
+        elif d.get('minutes', 30) > 0:
+            sketches["failures"].add(d.get('minutes', 30))
+    return sketches
+
+def merge_duration_sketches(target, other):
+    for name, sketch in other.items():
+        target[name].merge(sketch)
+    return target
+
+def duration_sketches_to_dict(sketches):
+    return {name: sketch.to_dict() for name, sketch in sketches.items()}
+
+def duration_sketches_from_dict(data):
+    sketches = build_duration_sketches([])
+    for name, raw in data.items():
+        sketches[name] = QuantileSketch.from_dict(raw)
+    return sketches
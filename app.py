@@ -7,6 +7,7 @@ from routes.planner_routes import planner
 from routes.progress_routes import progress
 from routes.mentor_routes import mentor
 from routes.impact_routes import impact
+from routes.cache_routes import cache
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -17,6 +18,7 @@ app.register_blueprint(planner)
 app.register_blueprint(progress)
 app.register_blueprint(mentor, url_prefix='/mentor')
 app.register_blueprint(impact, url_prefix='/impact')
+app.register_blueprint(cache, url_prefix='/cache')
 
 if __name__ == "__main__":
     if app.config['SECRET_KEY'] == 'supersecretkey':
@@ -3,3 +3,16 @@ import os
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "supersecretkey")
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "jwt-secret-key")
+
+    # Write-behind tuning for progress check-ins: flush every N seconds or as
+    # soon as this many check-ins are waiting, whichever comes first
+    PROGRESS_FLUSH_INTERVAL = float(os.environ.get("PROGRESS_FLUSH_INTERVAL", 5.0))
+    PROGRESS_FLUSH_BATCH_SIZE = int(os.environ.get("PROGRESS_FLUSH_BATCH_SIZE", 50))
+
+    # Cache backend shared by auth/mentor/impact: "file" or "redis" are shared by
+    # all workers; "memory" is per-process and skips write-invalidated namespaces
+    CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "file")
+    CACHE_DIR = os.environ.get("CACHE_DIR", "database/cache")
+    CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", 1024))
+    CACHE_REDIS_HOST = os.environ.get("CACHE_REDIS_HOST", "127.0.0.1")
+    CACHE_REDIS_PORT = int(os.environ.get("CACHE_REDIS_PORT", 6379))
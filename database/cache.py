@@ -0,0 +1,368 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from config import Config
+
+DEFAULT_TTL = 300
+
+class CacheBackend:
+    """
+    Base class for string key/value stores. Subclasses implement _get/_set/_delete;
+    the public methods record per-operation latency for metrics().
+    `shared` marks backends whose entries (and invalidations) are visible to
+    every worker process.
+    """
+    name = "base"
+    shared = False
+
+    def __init__(self):
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def _timed(self, op, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                s = self._stats.setdefault(op, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+                s["calls"] += 1
+                s["total_ms"] += elapsed * 1000
+                s["max_ms"] = max(s["max_ms"], elapsed * 1000)
+
+    def get(self, key):
+        value = self._timed("get", self._get, key)
+        with self._stats_lock:
+            field = "hits" if value is not None else "misses"
+            self._stats[field] = self._stats.get(field, 0) + 1
+        return value
+
+    def peek(self, key):
+        """
+        Like get(), but timed separately and left out of hit/miss counts;
+        used for namespace bookkeeping such as generation tokens.
+        """
+        return self._timed("peek", self._get, key)
+
+    def set(self, key, value, ttl=None):
+        self._timed("set", self._set, key, value, ttl)
+
+    def delete(self, key):
+        self._timed("delete", self._delete, key)
+
+    def metrics(self):
+        with self._stats_lock:
+            out = {"backend": self.name}
+            for op, s in self._stats.items():
+                if isinstance(s, dict):
+                    out[op] = dict(s, avg_ms=round(s["total_ms"] / s["calls"], 3))
+                else:
+                    out[op] = s
+            return out
+
+class MemoryBackend(CacheBackend):
+    """
+    In-process LRU. Fast, but private to each worker: invalidations in one
+    worker are not seen by the others.
+    """
+    name = "memory"
+
+    def __init__(self, max_entries=1024):
+        super().__init__()
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def _set(self, key, value, ttl):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def _delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+class FileBackend(CacheBackend):
+    """
+    One file per key in a shared directory, so every worker on the host sees the
+    same entries. Writes go through os.replace to stay atomic.
+    """
+    name = "file"
+    shared = True
+    PRUNE_EVERY = 200
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._writes = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+    def _get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                item = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if item.get("expires_at") is not None and item["expires_at"] < time.time():
+            self._remove(path)
+            return None
+        return item.get("value")
+
+    def _set(self, key, value, ttl):
+        path = self._path(key)
+        tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        item = {"value": value, "expires_at": time.time() + ttl if ttl else None}
+        with open(tmp_file, 'w') as f:
+            json.dump(item, f)
+        os.replace(tmp_file, path)
+
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self._prune()
+
+    def _delete(self, key):
+        self._remove(self._path(key))
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _prune(self):
+        now = time.time()
+        for entry in os.listdir(self.directory):
+            if not entry.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, entry)
+            try:
+                with open(path, 'r') as f:
+                    expires_at = json.load(f).get("expires_at")
+            except (OSError, ValueError):
+                continue
+            if expires_at is not None and expires_at < now:
+                self._remove(path)
+
+class RedisBackend(CacheBackend):
+    """
+    Minimal RESP client (GET/SET/DEL) over a plain socket, so any Redis-protocol
+    server works without an extra dependency. Connection errors degrade to misses,
+    and after one the backend stays offline for `retry_after` seconds instead of
+    paying a connect timeout on every call.
+    """
+    name = "redis"
+    shared = True
+
+    def __init__(self, host="127.0.0.1", port=6379, timeout=0.5, retry_after=5.0):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._offline_until = 0.0
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile('rb')
+
+    def _close(self):
+        try:
+            if self._sock:
+                self._sock.close()
+        except OSError:
+            pass
+        self._sock = None
+        self._reader = None
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by cache server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b'+':
+            return body.decode()
+        if kind == b'-':
+            raise RuntimeError(body.decode())
+        if kind == b':':
+            return int(body)
+        if kind == b'$':
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2].decode()
+        if kind == b'*':
+            count = int(body)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise RuntimeError(f"Unexpected reply from cache server: {line!r}")
+
+    def command(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = str(arg).encode()
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        payload = b"".join(parts)
+
+        with self._lock:
+            if time.time() < self._offline_until:
+                return None
+            try:
+                if self._sock is None:
+                    self._connect()
+                self._sock.sendall(payload)
+                return self._read_reply()
+            except RuntimeError as e:
+                print(f"Cache server error: {e}")
+                return None
+            except (OSError, ConnectionError) as e:
+                print(f"Cache server unavailable, retrying in {self.retry_after}s: {e}")
+                self._close()
+                self._offline_until = time.time() + self.retry_after
+                return None
+
+    def _get(self, key):
+        return self.command("GET", key)
+
+    def _set(self, key, value, ttl):
+        if ttl:
+            self.command("SET", key, value, "PX", max(1, int(ttl * 1000)))
+        else:
+            self.command("SET", key, value)
+
+    def _delete(self, key):
+        self.command("DEL", key)
+
+def create_backend(kind=None):
+    kind = kind or Config.CACHE_BACKEND
+    if kind == "file":
+        return FileBackend(Config.CACHE_DIR)
+    if kind == "redis":
+        return RedisBackend(Config.CACHE_REDIS_HOST, Config.CACHE_REDIS_PORT)
+    return MemoryBackend(Config.CACHE_MAX_ENTRIES)
+
+_backend = None
+_backend_lock = threading.Lock()
+_namespaces = {}
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+def set_backend(backend):
+    """
+    Swaps the shared backend (e.g. for tests). Existing namespaces follow it.
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+class Cache:
+    """
+    A namespaced view over the shared backend. Values are stored as JSON.
+
+    Each namespace has a generation token stored in the backend itself; bumping it
+    orphans every key in the namespace at once, which keeps invalidation consistent
+    across workers without scanning keys.
+
+    Namespaces created with write_invalidated=True depend on notify_write() for
+    correctness, so they are bypassed entirely on a backend that is not shared
+    between workers.
+    """
+
+    def __init__(self, namespace, ttl=DEFAULT_TTL, write_invalidated=False):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.write_invalidated = write_invalidated
+
+    @property
+    def backend(self):
+        return get_backend()
+
+    @property
+    def enabled(self):
+        return self.backend.shared or not self.write_invalidated
+
+    def _generation(self):
+        return self.backend.peek(f"{self.namespace}:__gen__") or "0"
+
+    def _key(self, key, generation):
+        return f"{self.namespace}:{generation}:{key}"
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        raw = self.backend.get(self._key(key, self._generation()))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        if self.enabled:
+            self.backend.set(self._key(key, self._generation()), json.dumps(value), ttl or self.ttl)
+
+    def delete(self, key):
+        if self.enabled:
+            self.backend.delete(self._key(key, self._generation()))
+
+    def get_or_set(self, key, compute, ttl=None):
+        if not self.enabled:
+            return compute()
+        # Read the generation once: if a write invalidates the namespace while
+        # compute() runs, the result is stored under the old generation and is
+        # never served, instead of landing under the new one.
+        full_key = self._key(key, self._generation())
+        raw = self.backend.get(full_key)
+        if raw is not None:
+            return json.loads(raw)
+        value = compute()
+        self.backend.set(full_key, json.dumps(value), ttl or self.ttl)
+        return value
+
+    def invalidate(self):
+        self.backend.set(f"{self.namespace}:__gen__", uuid.uuid4().hex)
+
+def get_cache(namespace, ttl=DEFAULT_TTL, write_invalidated=False):
+    cache = _namespaces.get(namespace)
+    if cache is None:
+        cache = _namespaces.setdefault(namespace, Cache(namespace, ttl, write_invalidated))
+    return cache
+
+def notify_write(namespace):
+    """
+    Write-invalidation hook called by database.db after a save.
+    """
+    get_cache(namespace).invalidate()
+
+def metrics():
+    return get_backend().metrics()
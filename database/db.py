@@ -1,7 +1,32 @@
+import atexit
+import fcntl
+import hashlib
 import json
 import os
+import threading
+import uuid
+from contextlib import contextmanager
+from ai.sketch import (
+    build_duration_sketches, merge_duration_sketches,
+    duration_sketches_to_dict, duration_sketches_from_dict
+)
+from config import Config
+from database.cache import get_cache, notify_write
 
 DB_FILE = 'database/users.json'
+PROGRESS_DIR = 'database/progress'
+SKETCH_DIR = 'database/sketches'
+ANONYMOUS_USER = '_anonymous'
+# Pseudo-user whose sketch is every check-in merged, kept up to date on flush
+COHORT_KEY = '_cohort'
+IMPACT_FILE = 'database/impact_state.json'
+STUDY_HISTORY_FILE = 'database/study_history.json'
+
+PROGRESS_FLUSH_INTERVAL = Config.PROGRESS_FLUSH_INTERVAL
+PROGRESS_FLUSH_BATCH_SIZE = Config.PROGRESS_FLUSH_BATCH_SIZE
+
+users_cache = get_cache("users", write_invalidated=True)
+impact_cache = get_cache("impact", write_invalidated=True)
 
 def load_users():
     if not os.path.exists(DB_FILE):
@@ -13,6 +38,17 @@ def load_users():
         print(f"Error loading users: {e}")
         return []
 
+def find_user(email):
+    """
+    Cached per-email lookup. The password is never copied into the cache.
+    """
+    def lookup():
+        for user in load_users():
+            if user.get("email") == email:
+                return {k: v for k, v in user.items() if k != "password"}
+        return None
+    return users_cache.get_or_set(f"email:{email}", lookup)
+
 def save_user(user):
     users = load_users()
     users.append(user)
@@ -21,9 +57,301 @@ def save_user(user):
             json.dump(users, f, indent=4)
     except Exception as e:
         print(f"Error saving user: {e}")
+    notify_write("users")
+
+def load_study_history():
+    if not os.path.exists(STUDY_HISTORY_FILE):
+        return []
+    try:
+        with open(STUDY_HISTORY_FILE, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading study history: {e}")
+        return []
+
+def study_history_version():
+    """
+    Changes whenever study_history.json is rewritten; used to key derived caches.
+    Inode and size cover rewrites within the filesystem's mtime resolution
+    (os.replace always yields a new inode).
+    """
+    try:
+        st = os.stat(STUDY_HISTORY_FILE)
+    except OSError:
+        return "0"
+    return f"{st.st_ino}-{st.st_size}-{st.st_mtime_ns}"
+
+def _read_impact_state():
+    if os.path.exists(IMPACT_FILE):
+        with open(IMPACT_FILE, 'r') as f:
+            return json.load(f)
+    return {
+        "trees": [],
+        "seeds": 0,
+        "total_impact_points": 0,
+        "co2_offset_symbolic": 0.0
+    }
+
+def load_impact_state():
+    """
+    Cached forest state, for reading only. Changes go through update_impact_state.
+    """
+    return impact_cache.get_or_set("state", _read_impact_state)
+
+def update_impact_state(update):
+    """
+    Read-modify-write of the forest state under a lock shared by every worker.
+    `update(state)` mutates the fresh state and returns False if nothing changed.
+    """
+    with _file_lock(IMPACT_FILE):
+        state = _read_impact_state()
+        if update(state) is not False:
+            _write_json(IMPACT_FILE, state)
+            notify_write("impact")
+    return state
 
 # Initial load
 users = load_users()
 
-# We can keep progress_data in memory or add similar persistence if needed later
-progress_data = []
+# Progress check-ins are buffered here and written out in batches by a
+# background flusher, so frequent client timers don't each rewrite the file.
+_pending_progress = []
+# The batch currently being written; stays visible to readers until it is on disk
+_inflight_progress = []
+# Per-user (and cohort) duration sketches for check-ins not yet flushed.
+# Sketches merge, so each worker folds only its own delta into SKETCH_DIR.
+_pending_sketches = {}
+_progress_lock = threading.Lock()
+# Serializes flushes within this process (timer thread vs. atexit). Sketch reads
+# take it too, since sketch deltas leave the buffer when a flush starts.
+_flush_lock = threading.Lock()
+_flush_requested = threading.Event()
+_flusher = None
+
+@contextmanager
+def _file_lock(path, shared=False):
+    """
+    Advisory lock shared by every worker process on this host. Readers take it
+    shared, writers exclusive.
+    """
+    with open(path + '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _progress_user_dir(email):
+    key = email or ANONYMOUS_USER
+    return os.path.join(PROGRESS_DIR, hashlib.sha1(key.encode()).hexdigest())
+
+def _read_progress_day(user_dir, day):
+    """
+    Reads one user's check-ins for one day (JSON Lines, one check-in per line).
+    """
+    path = os.path.join(user_dir, day + ".jsonl")
+    entries = []
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    print("Skipping malformed progress line")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error loading progress: {e}")
+    return entries
+
+def _stored_progress_days(user_dir):
+    try:
+        return sorted(name[:-len(".jsonl")] for name in os.listdir(user_dir) if name.endswith(".jsonl"))
+    except FileNotFoundError:
+        return []
+
+def _unflushed_progress(email):
+    with _progress_lock:
+        return [e for e in _pending_progress + _inflight_progress if e.get("email") == email]
+
+def get_progress_days(email):
+    """
+    Dates with check-ins for one user, stored or still buffered, oldest first.
+    """
+    days = set(_stored_progress_days(_progress_user_dir(email)))
+    days.update(e["date"] for e in _unflushed_progress(email))
+    return sorted(days)
+
+def get_progress_entries(email, start=None, end=None):
+    """
+    One user's check-ins within [start, end] (inclusive YYYY-MM-DD strings),
+    including buffered ones. Only that user's files for those days are read.
+    """
+    # Snapshot the buffer before reading files: anything flushed in between is
+    # then found on disk and de-duplicated by id, so nothing is missed.
+    unflushed = _unflushed_progress(email)
+    user_dir = _progress_user_dir(email)
+
+    entries = []
+    if os.path.isdir(user_dir):
+        with _file_lock(user_dir, shared=True):
+            for day in _stored_progress_days(user_dir):
+                if (start and day < start) or (end and day > end):
+                    continue
+                entries.extend(_read_progress_day(user_dir, day))
+
+    seen = {e.get("id") for e in entries}
+    for e in unflushed:
+        if e["id"] in seen:
+            continue
+        if (start and e["date"] < start) or (end and e["date"] > end):
+            continue
+        entries.append(e)
+    return entries
+
+def _append_progress(batch):
+    by_user = {}
+    for entry in batch:
+        by_user.setdefault(entry.get("email"), []).append(entry)
+
+    for email, entries in by_user.items():
+        user_dir = _progress_user_dir(email)
+        os.makedirs(user_dir, exist_ok=True)
+        by_day = {}
+        for entry in entries:
+            by_day.setdefault(entry["date"], []).append(entry)
+        with _file_lock(user_dir):
+            for day, day_entries in by_day.items():
+                with open(os.path.join(user_dir, day + ".jsonl"), 'a') as f:
+                    f.write("".join(json.dumps(e) + "\n" for e in day_entries))
+
+def _sketch_path(key):
+    return os.path.join(SKETCH_DIR, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+def load_sketches(key):
+    """
+    Persisted duration sketches for one user (or COHORT_KEY); one file per key,
+    so lookups cost the same however many users there are.
+    """
+    path = _sketch_path(key)
+    if not os.path.exists(path):
+        return build_duration_sketches([])
+    try:
+        with open(path, 'r') as f:
+            return duration_sketches_from_dict(json.load(f))
+    except Exception as e:
+        print(f"Error loading sketches: {e}")
+        return build_duration_sketches([])
+
+def get_duration_sketches(email=None):
+    """
+    Session/failure duration sketches for one user, including unflushed check-ins.
+    """
+    key = email or ANONYMOUS_USER
+    with _flush_lock:
+        sketches = load_sketches(key)
+        with _progress_lock:
+            pending = _pending_sketches.get(key)
+            if pending:
+                merge_duration_sketches(sketches, pending)
+    return sketches
+
+def get_cohort_sketches():
+    """
+    All users' sketches merged into a single cohort-level baseline.
+    """
+    return get_duration_sketches(COHORT_KEY)
+
+def record_progress(entry):
+    """
+    Queues a check-in for the next batched flush.
+    """
+    _ensure_flusher()
+    # Lets readers de-duplicate a check-in seen both in the buffer and on disk
+    entry.setdefault("id", uuid.uuid4().hex)
+    with _progress_lock:
+        _pending_progress.append(entry)
+        for key in (entry.get("email") or ANONYMOUS_USER, COHORT_KEY):
+            build_duration_sketches([entry], _pending_sketches.setdefault(key, build_duration_sketches([])))
+        if len(_pending_progress) >= PROGRESS_FLUSH_BATCH_SIZE:
+            _flush_requested.set()
+
+def flush_progress():
+    """
+    Appends all buffered check-ins to their per-user, per-day files.
+    File I/O happens outside _progress_lock so check-ins never wait on disk.
+    """
+    with _flush_lock:
+        with _progress_lock:
+            if not _pending_progress:
+                return 0
+            batch = list(_pending_progress)
+            _inflight_progress[:] = batch
+            _pending_progress.clear()
+            sketch_deltas = dict(_pending_sketches)
+            _pending_sketches.clear()
+
+        try:
+            _append_progress(batch)
+        except Exception as e:
+            print(f"Error saving progress: {e}")
+            # Keep the batch so the next flush retries it
+            with _progress_lock:
+                _pending_progress[:0] = batch
+                _inflight_progress.clear()
+            _requeue_sketch_deltas(sketch_deltas)
+            return 0
+
+        with _progress_lock:
+            _inflight_progress.clear()
+
+        try:
+            _merge_sketch_deltas(sketch_deltas)
+        except Exception as e:
+            print(f"Error saving sketches: {e}")
+            # Whatever was not written goes back so the next flush retries it
+            _requeue_sketch_deltas(sketch_deltas)
+    return len(batch)
+
+def _requeue_sketch_deltas(deltas):
+    with _progress_lock:
+        for key, delta in deltas.items():
+            merge_duration_sketches(_pending_sketches.setdefault(key, build_duration_sketches([])), delta)
+
+def _merge_sketch_deltas(deltas):
+    os.makedirs(SKETCH_DIR, exist_ok=True)
+    # One lock for the whole read-merge-write so concurrent workers never
+    # drop each other's deltas
+    with _file_lock(os.path.join(SKETCH_DIR, "sketches")):
+        for key, delta in list(deltas.items()):
+            sketches = merge_duration_sketches(load_sketches(key), delta)
+            _write_json(_sketch_path(key), duration_sketches_to_dict(sketches))
+            # Drop written deltas so a failure part-way only retries the rest
+            del deltas[key]
+
+def _write_json(path, data):
+    # Per-process/thread temp name so concurrent writers never share a file
+    tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_file, path)
+
+def _flush_loop():
+    while True:
+        _flush_requested.wait(PROGRESS_FLUSH_INTERVAL)
+        _flush_requested.clear()
+        flush_progress()
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _progress_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_loop, name="progress-flusher", daemon=True)
+            _flusher.start()
+
+# Durable flush on interpreter/worker shutdown
+atexit.register(flush_progress)
@@ -0,0 +1,63 @@
+from utils.time_utils import now_iso, parse_date
+
+def make_checkin(data):
+    """
+    Normalizes a client check-in into the history entry shape used by ai.ml_logic.
+    Returns (entry, error).
+    """
+    subject = data.get("subject")
+    if not subject or not isinstance(subject, str):
+        return None, "Missing required field: subject (string)"
+
+    for field in ("email", "difficulty", "timestamp", "date"):
+        if data.get(field) is not None and not isinstance(data[field], str):
+            return None, f"{field} must be a string"
+
+    minutes = data.get("minutes", 0)
+    if isinstance(minutes, bool) or not isinstance(minutes, (int, float)) \
+            or (isinstance(minutes, float) and not minutes.is_integer()):
+        return None, "minutes must be an integer"
+    minutes = int(minutes)
+    if minutes < 0:
+        return None, "minutes must be non-negative"
+
+    completed = data.get("completed", False)
+    if not isinstance(completed, bool):
+        return None, "completed must be a boolean"
+
+    timestamp = data.get("timestamp") or now_iso()
+    day = data.get("date") or timestamp.split("T")[0]
+    if not parse_date(day):
+        return None, "date must be formatted as YYYY-MM-DD"
+
+    entry = {
+        "email": data.get("email"),
+        "subject": subject,
+        "minutes": minutes,
+        "completed": completed,
+        "difficulty": data.get("difficulty") or "average",
+        "date": day,
+        "timestamp": timestamp
+    }
+    return entry, None
+
+def summarize_day(entries):
+    """
+    Collapses a day's sessions into { subject: completed }, the last_day_progress
+    shape expected by generate_study_plan. A subject counts as done if any of its
+    sessions was completed.
+    """
+    summary = {}
+    for e in entries:
+        sub = e.get("subject")
+        if not sub:
+            continue
+        summary[sub] = summary.get(sub, False) or bool(e.get("completed"))
+    return summary
+
+def sessions_from_summary(summary):
+    """
+    Expands a { subject: completed } summary back into the session list shape
+    that mentor_message iterates over.
+    """
+    return [{"subject": sub, "completed": bool(done)} for sub, done in summary.items()]
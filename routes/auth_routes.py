@@ -4,16 +4,13 @@ auth = Blueprint('auth', __name__)
 
 @auth.route("/register", methods=["POST"])
 def register():
-    # Refresh users list from file to be safe
-    from database.db import save_user, load_users
-    users = load_users()
-    
+    from database.db import save_user, find_user
+
     data = request.json
     # Basic check if user exists
-    for user in users:
-        if user["email"] == data["email"]:
-             return jsonify({"error": "User already exists"}), 400
-             
+    if find_user(data["email"]):
+        return jsonify({"error": "User already exists"}), 400
+
     # Append to memory list (global reference in db.py updates)
     # But better to just use save_user which handles load-append-save
     save_user(data)
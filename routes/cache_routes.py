@@ -0,0 +1,18 @@
+from flask import Blueprint, jsonify
+import os
+from database.cache import metrics
+
+cache = Blueprint("cache", __name__)
+
+@cache.route("/metrics", methods=["GET"])
+def get_metrics():
+    """
+    Latency and hit/miss counters for the cache backend.
+    Counters are per worker process: each gunicorn worker reports its own,
+    tagged with its pid, so sample repeatedly to cover every worker.
+    """
+    return jsonify({
+        "worker_pid": os.getpid(),
+        "scope": "per-worker",
+        "metrics": metrics()
+    })
@@ -1,38 +1,16 @@
 from flask import Blueprint, jsonify
-import json
-import os
+from database.db import load_impact_state, update_impact_state, load_study_history
 
 impact = Blueprint("impact", __name__)
 
-IMPACT_DATABASE = 'database/impact_state.json'
-STUDY_HISTORY = 'database/study_history.json'
-
-def get_impact_state():
-    if os.path.exists(IMPACT_DATABASE):
-        with open(IMPACT_DATABASE, 'r') as f:
-            return json.load(f)
-    return {
-        "trees": [],
-        "seeds": 0,
-        "total_impact_points": 0,
-        "co2_offset_symbolic": 0.0
-    }
-
-def save_impact_state(state):
-    with open(IMPACT_DATABASE, 'w') as f:
-        json.dump(state, f, indent=4)
-
 @impact.route("/state", methods=["GET"])
 def get_state():
     """
     Returns the current state of the Digital Forest.
     Calculates dynamic growth based on study history.
     """
-    state = get_impact_state()
-    history = []
-    if os.path.exists(STUDY_HISTORY):
-        with open(STUDY_HISTORY, 'r') as f:
-            history = json.load(f)
+    state = load_impact_state()
+    history = load_study_history()
 
     # Calculate Total Points from history (1 point per 60 minutes)
     total_minutes = sum(d.get('minutes', 0) for d in history if d.get('completed'))
@@ -41,17 +19,21 @@ def get_state():
     
     # Update state if new seeds/trees earned
     if expected_total > state["total_impact_points"]:
-        new_items = int(expected_total - state["total_impact_points"])
-        for _ in range(new_items):
-            state["trees"].append({
-                "id": len(state["trees"]) + 1,
-                "type": "oak", # Could be randomized
-                "stage": "seed", # seed -> sprout -> sapling -> tree
-                "planted_at": "Today"
-            })
-        state["total_impact_points"] = int(expected_total)
-        state["co2_offset_symbolic"] = round(expected_total * 0.5, 2) # Heuristic: 0.5kg per tree
-        save_impact_state(state)
+        def plant(state):
+            if expected_total <= state["total_impact_points"]:
+                return False
+            new_items = int(expected_total - state["total_impact_points"])
+            for _ in range(new_items):
+                state["trees"].append({
+                    "id": len(state["trees"]) + 1,
+                    "type": "oak", # Could be randomized
+                    "stage": "seed", # seed -> sprout -> sapling -> tree
+                    "planted_at": "Today"
+                })
+            state["total_impact_points"] = int(expected_total)
+            state["co2_offset_symbolic"] = round(expected_total * 0.5, 2) # Heuristic: 0.5kg per tree
+
+        state = update_impact_state(plant)
 
     return jsonify(state)
 
@@ -61,11 +43,11 @@ def grow_trees():
     Simulates growth over time.
     Actually just a placeholder for now to advance stages.
     """
-    state = get_impact_state()
-    for tree in state["trees"]:
-        if tree["stage"] == "seed": tree["stage"] = "sprout"
-        elif tree["stage"] == "sprout": tree["stage"] = "sapling"
-        elif tree["stage"] == "sapling": tree["stage"] = "tree"
-    
-    save_impact_state(state)
+    def grow(state):
+        for tree in state["trees"]:
+            if tree["stage"] == "seed": tree["stage"] = "sprout"
+            elif tree["stage"] == "sprout": tree["stage"] = "sapling"
+            elif tree["stage"] == "sapling": tree["stage"] = "tree"
+
+    state = update_impact_state(grow)
     return jsonify(state)
@@ -1,20 +1,23 @@
 from flask import Blueprint, jsonify
-import json
-import os
 from ai.ml_logic import calculate_weakness_scores, calculate_dropout_risk, calculate_study_profile
+from database.cache import get_cache
+from database.db import load_study_history, study_history_version
 
 mentor = Blueprint("mentor", __name__)
 
+mentor_cache = get_cache("mentor", ttl=60)
+
 @mentor.route("/stats", methods=["GET"])
 def get_mentor_stats():
     """
     Aggregates high-level intelligence for Parents/Mentors.
+    Cached per version of the study history file.
     """
-    history_file = 'database/study_history.json'
-    history = []
-    if os.path.exists(history_file):
-        with open(history_file, 'r') as f:
-            history = json.load(f)
+    stats = mentor_cache.get_or_set(f"stats:{study_history_version()}", _build_mentor_stats)
+    return jsonify(stats)
+
+def _build_mentor_stats():
+    history = load_study_history()
 
     # 1. Consistency Score (last 7 days)
     # Heuristic: (Days active / 7) * (Completion Rate)
@@ -71,7 +74,7 @@ def get_mentor_stats():
     sorted_weakness = sorted(weaknesses.items(), key=lambda x: x[1], reverse=True)
     top_priority = sorted_weakness[0][0] if sorted_weakness else "All clear"
 
-    return jsonify({
+    return {
         "consistency_score": min(100, consistency_score),
         "effort_trend": effort_trend,
         "dropout_risk": dropout_risk,
@@ -82,4 +85,4 @@ def get_mentor_stats():
             "total_minutes": sum(d.get('actual', 0) for d in effort_trend),
             "avg_completion": f"{int(completion_rate * 100)}%"
         }
-    })
+    }
@@ -2,9 +2,27 @@ from flask import Blueprint, request, jsonify
 from ai.planner import generate_study_plan
 from ai.mentor import mentor_message
 from ai.ml_logic import calculate_weakness_scores, calculate_dropout_risk, recommend_time_range, calculate_study_profile
+from database.db import get_progress_entries, get_progress_days, get_duration_sketches, get_cohort_sketches
+from models.progress import summarize_day, sessions_from_summary
+from utils.time_utils import today_str
 
 planner = Blueprint("planner", __name__)
 
+def _time_recommendation(data, history):
+    """
+    Prefers the user's stored duration sketches, then the posted history,
+    then the cohort baseline for brand-new users.
+    """
+    if data.get("email"):
+        sketches = get_duration_sketches(data["email"])
+        if sketches["sessions"].count or sketches["failures"].count:
+            return recommend_time_range(history, sketches=sketches)
+    if not history:
+        cohort = get_cohort_sketches()
+        if cohort["sessions"].count:
+            return recommend_time_range(history, sketches=cohort, cohort=True)
+    return recommend_time_range(history)
+
 @planner.route("/predict-weakness", methods=["POST"])
 def predict_weakness():
     data = request.get_json()
@@ -16,7 +34,7 @@ def predict_weakness():
 def predict_time():
     data = request.get_json()
     history = data.get("history", [])
-    rec = recommend_time_range(history)
+    rec = _time_recommendation(data, history)
     return jsonify({"time_recommendation": rec})
 
 @planner.route("/generate-plan", methods=["POST"])
@@ -33,23 +51,39 @@ def generate_plan():
     weakness_results = calculate_weakness_scores(history)
     dropout_result = calculate_dropout_risk(history, streak)
     profile_result = calculate_study_profile(history)
-    time_result = recommend_time_range(history)
+    time_result = _time_recommendation(data, history)
 
     # Extract values for dependency injection
     study_profile = profile_result["value"]
     dropout_risk = dropout_result["level"]
 
+    # Prefer client-supplied progress; otherwise derive it from stored check-ins.
+    # Either way mentor_message gets a list of sessions.
+    last_day_progress = data.get("last_day_progress")
+    mentor_progress = []
+    if last_day_progress is not None:
+        if not isinstance(last_day_progress, dict):
+            return jsonify({"error": "last_day_progress must be an object of subject: completed"}), 400
+        mentor_progress = sessions_from_summary(last_day_progress)
+    else:
+        last_day_progress = {}
+        if data.get("email"):
+            earlier = [d for d in get_progress_days(data["email"]) if d < today_str()]
+            if earlier:
+                mentor_progress = get_progress_entries(data["email"], start=earlier[-1], end=earlier[-1])
+                last_day_progress = summarize_day(mentor_progress)
+
     plan = generate_study_plan(
         data["subjects"],
         data["daily_time_minutes"],
-        data.get("last_day_progress", {}),
+        last_day_progress,
         study_profile=study_profile
     )
 
     mentor = mentor_message(
         data["subjects"],
         data["daily_time_minutes"],
-        data.get("last_day_progress", {}),
+        mentor_progress,
         streak,
         dropout_risk=dropout_risk,
         study_profile=study_profile
@@ -57,6 +91,7 @@ def generate_plan():
     
     return jsonify({
         "study_plan": plan,
+        "last_day_progress": last_day_progress,
         "mentor_message": mentor,
         "weakness_scores": weakness_results,
         "dropout_risk": dropout_risk,
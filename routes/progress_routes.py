@@ -1,7 +1,60 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
+from database.db import record_progress, get_progress_entries
+from models.progress import make_checkin, summarize_day
+from utils.time_utils import today_str, parse_date
 
 progress = Blueprint("progress", __name__)
 
+@progress.route("/progress", methods=["POST"])
+def check_in():
+    """
+    Records a study session check-in. Writes are buffered and flushed in batches.
+    """
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data, dict):
+        return jsonify({"error": "Missing check-in payload"}), 400
+
+    entry, error = make_checkin(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    record_progress(entry)
+    return jsonify({"message": "Check-in recorded", "entry": entry}), 201
+
 @progress.route("/progress", methods=["GET"])
 def get_progress():
-    return jsonify({"message": "Progress route placeholder"})
+    """
+    Returns a user's progress (?email= is required) for today, or a date range
+    via ?start=YYYY-MM-DD&end=YYYY-MM-DD.
+    """
+    email = request.args.get("email")
+    if not email:
+        return jsonify({"error": "Missing required query parameter: email"}), 400
+    start = request.args.get("start") or today_str()
+    end = request.args.get("end") or start
+
+    if not parse_date(start) or not parse_date(end):
+        return jsonify({"error": "Dates must be formatted as YYYY-MM-DD"}), 400
+    if start > end:
+        return jsonify({"error": "start must not be after end"}), 400
+
+    entries = get_progress_entries(email, start=start, end=end)
+
+    days = {}
+    for e in entries:
+        days.setdefault(e["date"], []).append(e)
+
+    return jsonify({
+        "start": start,
+        "end": end,
+        "sessions": entries,
+        "daily": {
+            d: {
+                "minutes": sum(e.get("minutes", 0) for e in sessions),
+                "completed": sum(1 for e in sessions if e.get("completed")),
+                "total": len(sessions),
+                "last_day_progress": summarize_day(sessions)
+            } for d, sessions in sorted(days.items())
+        },
+        "total_minutes": sum(e.get("minutes", 0) for e in entries)
+    })
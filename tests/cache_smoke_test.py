@@ -0,0 +1,209 @@
+import multiprocessing
+import os
+import socketserver
+import threading
+import time
+import pytest
+from database import cache, db
+from database.cache import MemoryBackend, FileBackend, RedisBackend, Cache, set_backend
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeRedisHandler)
+        self.store = {}
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """
+    Speaks just enough RESP (GET/SET [PX]/DEL) to exercise RedisBackend.
+    """
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2].decode())
+        return args
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            cmd = args[0].upper()
+            if cmd == "GET":
+                value, expires_at = store.get(args[1], (None, None))
+                if value is None or (expires_at and expires_at < time.time()):
+                    self.wfile.write(b"$-1\r\n")
+                else:
+                    data = value.encode()
+                    self.wfile.write(b"$%d\r\n%s\r\n" % (len(data), data))
+            elif cmd == "SET":
+                expires_at = time.time() + int(args[4]) / 1000 if len(args) > 4 else None
+                store[args[1]] = (args[2], expires_at)
+                self.wfile.write(b"+OK\r\n")
+            elif cmd == "DEL":
+                removed = 1 if store.pop(args[1], None) else 0
+                self.wfile.write(b":%d\r\n" % removed)
+            else:
+                self.wfile.write(b"-ERR unknown command\r\n")
+
+@pytest.fixture
+def fake_redis():
+    server = FakeRedisServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def use_backend():
+    previous = cache._backend
+    def install(backend):
+        set_backend(backend)
+        return backend
+    yield install
+    set_backend(previous)
+
+@pytest.fixture(params=["memory", "file", "redis"])
+def backend(request, tmp_path, fake_redis, use_backend):
+    if request.param == "memory":
+        return use_backend(MemoryBackend())
+    if request.param == "file":
+        return use_backend(FileBackend(str(tmp_path / "cache")))
+    return use_backend(RedisBackend(*fake_redis.server_address))
+
+def test_round_trip_invalidation_and_ttl(backend):
+    c = Cache("smoke", ttl=1)
+
+    c.set("plan", {"minutes": 45})
+    assert c.get("plan") == {"minutes": 45}
+
+    c.invalidate()
+    assert c.get("plan") is None
+
+    c.set("short", [1, 2], ttl=0.05)
+    time.sleep(0.1)
+    assert c.get("short") is None
+
+def test_get_or_set_keeps_generation_from_before_compute(backend):
+    c = Cache("race")
+    source = ["old"]
+
+    def slow_read():
+        snapshot = list(source)
+        # A writer saves and invalidates while this reader is still computing
+        source.append("new")
+        c.invalidate()
+        return snapshot
+
+    assert c.get_or_set("items", slow_read) == ["old"]
+    assert c.get_or_set("items", lambda: list(source)) == ["old", "new"]
+
+def test_metrics_count_value_reads_only(backend):
+    c = Cache("metrics")
+    for _ in range(11):
+        c.get_or_set("k", lambda: 1)
+
+    stats = backend.metrics()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 10
+    assert stats["peek"]["calls"] == 11
+
+def test_memory_backend_skips_write_invalidated_namespaces(use_backend):
+    use_backend(MemoryBackend())
+    c = Cache("users", write_invalidated=True)
+    calls = []
+    c.get_or_set("k", lambda: calls.append(1) or 1)
+    c.get_or_set("k", lambda: calls.append(1) or 1)
+    assert len(calls) == 2
+
+def test_redis_backend_backs_off_when_server_is_down(use_backend, fake_redis):
+    host, port = fake_redis.server_address
+    fake_redis.shutdown()
+    fake_redis.server_close()
+
+    backend = use_backend(RedisBackend(host, port, retry_after=60))
+    attempts = []
+    connect = backend._connect
+    backend._connect = lambda: attempts.append(1) or connect()
+
+    c = Cache("down")
+    assert c.get_or_set("k", lambda: 5) == 5
+    assert c.get_or_set("k", lambda: 5) == 5
+    assert len(attempts) == 1
+
+def test_user_cache_never_stores_passwords(tmp_path, monkeypatch, use_backend):
+    cache_dir = tmp_path / "cache"
+    use_backend(FileBackend(str(cache_dir)))
+    monkeypatch.setattr(db, "DB_FILE", str(tmp_path / "users.json"))
+
+    assert db.find_user("a@example.com") is None
+    db.save_user({"email": "a@example.com", "password": "hunter2", "username": "A"})
+    assert db.find_user("a@example.com") == {"email": "a@example.com", "username": "A"}
+
+    for name in os.listdir(cache_dir):
+        with open(cache_dir / name) as f:
+            assert "hunter2" not in f.read()
+
+def test_register_rejects_duplicate_after_cached_miss(tmp_path, monkeypatch, use_backend):
+    from app import app
+    use_backend(FileBackend(str(tmp_path / "cache")))
+    monkeypatch.setattr(db, "DB_FILE", str(tmp_path / "users.json"))
+    client = app.test_client()
+
+    user = {"email": "b@example.com", "password": "pw"}
+    assert client.post("/auth/register", json=user).status_code == 201
+    assert client.post("/auth/register", json=user).status_code == 400
+    assert client.post("/auth/login", json=user).status_code == 200
+
+def _plant_trees(n):
+    for _ in range(n):
+        db.update_impact_state(lambda state: state["trees"].append({"stage": "seed"}))
+
+def test_concurrent_impact_updates_are_not_lost(tmp_path, monkeypatch, use_backend):
+    use_backend(FileBackend(str(tmp_path / "cache")))
+    monkeypatch.setattr(db, "IMPACT_FILE", str(tmp_path / "impact_state.json"))
+
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_plant_trees, args=(25,)) for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    assert len(db.load_impact_state()["trees"]) == 100
+
+def test_study_history_version_changes_on_same_mtime_rewrite(tmp_path, monkeypatch):
+    path = tmp_path / "study_history.json"
+    monkeypatch.setattr(db, "STUDY_HISTORY_FILE", str(path))
+    path.write_text("[]")
+    st = os.stat(path)
+    before = db.study_history_version()
+
+    tmp = tmp_path / "replacement.json"
+    tmp.write_text("[{}]")
+    os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(tmp, path)
+
+    assert os.stat(path).st_mtime_ns == st.st_mtime_ns
+    assert db.study_history_version() != before
+
+def test_metrics_endpoint_reports_per_worker_counters(use_backend):
+    from app import app
+    use_backend(MemoryBackend())
+    Cache("endpoint").get_or_set("k", lambda: 1)
+
+    res = app.test_client().get("/cache/metrics").get_json()
+    assert res["worker_pid"] == os.getpid()
+    assert res["scope"] == "per-worker"
+    assert res["metrics"]["backend"] == "memory"
+    assert res["metrics"]["misses"] == 1
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
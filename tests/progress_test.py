@@ -0,0 +1,157 @@
+import os
+import time
+import pytest
+from app import app
+from database import db
+from utils.time_utils import today_str
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "PROGRESS_DIR", str(tmp_path / "progress"))
+    monkeypatch.setattr(db, "SKETCH_DIR", str(tmp_path / "sketches"))
+    db.flush_progress()
+    with db._progress_lock:
+        db._pending_progress.clear()
+        db._pending_sketches.clear()
+    yield app.test_client()
+    db.flush_progress()
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+def stored_count():
+    """
+    Check-ins that have reached disk, across every user's files.
+    """
+    total = 0
+    for root, _, files in os.walk(db.PROGRESS_DIR):
+        for name in files:
+            if name.endswith(".jsonl"):
+                with open(os.path.join(root, name)) as f:
+                    total += sum(1 for line in f if line.strip())
+    return total
+
+def check_in(client, **fields):
+    payload = {"email": "a@example.com", "subject": "math", "minutes": 30, "completed": True}
+    payload.update(fields)
+    return client.post("/progress", json=payload)
+
+def test_check_in_and_get_today(client):
+    assert check_in(client).status_code == 201
+    assert check_in(client, subject="bio", completed=False).status_code == 201
+
+    res = client.get("/progress?email=a@example.com").get_json()
+    assert len(res["sessions"]) == 2
+    assert res["total_minutes"] == 60
+    assert res["daily"][today_str()]["last_day_progress"] == {"math": True, "bio": False}
+
+def test_get_range(client):
+    check_in(client, date="2026-01-01")
+    check_in(client, date="2026-01-03")
+    check_in(client, date="2026-02-01")
+
+    res = client.get("/progress?email=a@example.com&start=2026-01-01&end=2026-01-31").get_json()
+    assert sorted(res["daily"]) == ["2026-01-01", "2026-01-03"]
+
+    assert client.get("/progress?email=a@example.com&start=2026-01-05&end=2026-01-01").status_code == 400
+    assert client.get("/progress?email=a@example.com&start=2026-1-5").status_code == 400
+
+def test_get_requires_email(client):
+    check_in(client)
+    assert client.get("/progress").status_code == 400
+
+def test_get_only_returns_that_users_sessions(client):
+    check_in(client)
+    check_in(client, email="b@example.com")
+    db.flush_progress()
+    check_in(client, email="b@example.com")
+
+    res = client.get("/progress?email=b@example.com").get_json()
+    assert len(res["sessions"]) == 2
+    assert {e["email"] for e in res["sessions"]} == {"b@example.com"}
+
+def test_get_sees_each_check_in_once_across_flush(client):
+    for _ in range(3):
+        check_in(client)
+    db.flush_progress()
+    check_in(client)
+    assert len(client.get("/progress?email=a@example.com").get_json()["sessions"]) == 4
+
+@pytest.mark.parametrize("fields", [
+    {"subject": ["math"]},
+    {"subject": ""},
+    {"timestamp": 1760000000},
+    {"date": 20261019},
+    {"date": "2026-13-40"},
+    {"minutes": "lots"},
+    {"minutes": -5},
+    {"minutes": True},
+    {"minutes": 2.9},
+    {"minutes": "30"},
+    {"completed": "false"},
+    {"completed": 0},
+])
+def test_check_in_rejects_bad_fields(client, fields):
+    assert check_in(client, **fields).status_code == 400
+    assert client.get("/progress?email=a@example.com").status_code == 200
+
+def test_check_in_accepts_integral_float_minutes(client):
+    res = check_in(client, minutes=30.0)
+    assert res.status_code == 201
+    assert res.get_json()["entry"]["minutes"] == 30
+
+def test_flush_on_batch_size(client, monkeypatch):
+    monkeypatch.setattr(db, "PROGRESS_FLUSH_BATCH_SIZE", 3)
+    for _ in range(2):
+        check_in(client)
+    assert stored_count() == 0
+
+    check_in(client)
+    assert wait_for(lambda: stored_count() == 3)
+
+def test_flush_on_timer(client, monkeypatch):
+    monkeypatch.setattr(db, "PROGRESS_FLUSH_INTERVAL", 0.05)
+    check_in(client)
+    # Wake the flusher once so its next wait uses the shortened interval
+    db._flush_requested.set()
+    check_in(client)
+    assert wait_for(lambda: stored_count() == 2)
+
+def test_generate_plan_uses_stored_progress(client):
+    check_in(client, subject="math", completed=True, date="2026-01-01")
+    check_in(client, subject="bio", completed=False, date="2026-01-01")
+    check_in(client, subject="bio", completed=True, date="2025-12-31")
+
+    res = client.post("/generate-plan", json={
+        "email": "a@example.com",
+        "subjects": ["math", "bio"],
+        "daily_time_minutes": 120
+    }).get_json()
+
+    assert res["last_day_progress"] == {"math": True, "bio": False}
+    minutes = {}
+    for block in res["study_plan"]:
+        minutes[block["subject"]] = minutes.get(block["subject"], 0) + block["minutes"]
+    # The subject missed last time gets the extra weight
+    assert minutes["bio"] > minutes["math"]
+
+def test_generate_plan_accepts_client_progress_summary(client):
+    res = client.post("/generate-plan", json={
+        "subjects": ["math", "bio"],
+        "daily_time_minutes": 120,
+        "last_day_progress": {"math": True, "bio": False}
+    })
+    assert res.status_code == 200
+    assert res.get_json()["last_day_progress"] == {"math": True, "bio": False}
+
+    res = client.post("/generate-plan", json={
+        "subjects": ["math"],
+        "daily_time_minutes": 60,
+        "last_day_progress": ["math"]
+    })
+    assert res.status_code == 400
@@ -0,0 +1,144 @@
+import multiprocessing
+import random
+import pytest
+from ai.sketch import QuantileSketch, build_duration_sketches
+from ai.ml_logic import recommend_time_range
+from database import db
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def test_quantile_error_on_normal_distribution():
+    rng = random.Random(7)
+    values = [rng.gauss(50, 15) for _ in range(50000)]
+    sketch = QuantileSketch()
+    for v in values:
+        sketch.add(v)
+
+    for q in (0.1, 0.25, 0.5, 0.75, 0.9):
+        # Within one percentile point of rank error
+        low, high = exact_quantile(values, q - 0.01), exact_quantile(values, q + 0.01)
+        assert low <= sketch.quantile(q) <= high
+
+def test_stored_items_stay_bounded():
+    sketch = QuantileSketch(k=128)
+    sizes = []
+    for n in (1000, 10000, 100000):
+        while sketch.count < n:
+            sketch.add(sketch.count % 97)
+        sizes.append(sketch._size())
+    assert max(sizes) <= 3 * 128
+    assert sizes[-1] - sizes[0] < 128
+    # Compaction preserves total weight exactly
+    assert sum(len(items) * 2 ** h for h, items in enumerate(sketch.levels)) == sketch.count
+
+def test_merge_matches_single_sketch():
+    rng = random.Random(11)
+    values = [rng.uniform(0, 120) for _ in range(20000)]
+    single, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i, v in enumerate(values):
+        single.add(v)
+        (left if i % 3 else right).add(v)
+
+    merged = left.merge(right)
+    assert merged.count == single.count == len(values)
+    for q in (0.1, 0.25, 0.5, 0.75, 0.9):
+        assert merged.quantile(q) == pytest.approx(single.quantile(q), abs=2.5)
+
+def test_to_dict_round_trip():
+    sketch = QuantileSketch(k=32)
+    for v in range(1000):
+        sketch.add(v)
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+    assert restored.k == 32
+    assert restored.count == sketch.count
+    assert restored.levels == sketch.levels
+    assert restored.quantile(0.5) == sketch.quantile(0.5)
+
+def test_empty_sketch_quantile_is_none():
+    assert QuantileSketch().quantile(0.5) is None
+
+HISTORY = (
+    [{"minutes": m, "completed": True} for m in (30, 40, 45, 50, 60, 40, 45, 50)]
+    + [{"minutes": m, "completed": False} for m in (55, 70, 80)]
+)
+
+def test_recommend_time_range_from_history():
+    rec = recommend_time_range(HISTORY)
+    # p25-p75 of completed sessions is 40-50; fatigue wall p20 of failures is 55
+    assert rec["range"] == [40, 50]
+    assert rec["confidence"] == "High"
+    assert "fatigue wall" in rec["rationale"]
+
+def test_recommend_time_range_caps_at_fatigue_wall():
+    history = [{"minutes": m, "completed": True} for m in (60, 70, 80, 90)]
+    history += [{"minutes": 65, "completed": False}]
+    # p25-p75 is 60-80, but failures start at 65
+    assert recommend_time_range(history)["range"] == [60, 65]
+
+def test_recommend_time_range_from_sketches_matches_history():
+    sketches = build_duration_sketches(HISTORY)
+    assert recommend_time_range([], sketches=sketches)["range"] == recommend_time_range(HISTORY)["range"]
+
+    cohort = recommend_time_range([], sketches=sketches, cohort=True)
+    assert cohort["confidence"] == "Low"
+    assert "cohort" in cohort["rationale"]
+
+def test_recommend_time_range_baseline():
+    assert recommend_time_range([])["range"] == [45, 90]
+
+def _record_and_flush(n):
+    # Flush after every check-in to maximise overlap between workers
+    for i in range(n):
+        db.record_progress({"email": "w@example.com", "subject": "math", "minutes": 30 + i, "completed": True, "date": "2026-01-01"})
+        db.flush_progress()
+
+def test_concurrent_worker_flushes_keep_every_delta(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "PROGRESS_DIR", str(tmp_path / "progress"))
+    monkeypatch.setattr(db, "SKETCH_DIR", str(tmp_path / "sketches"))
+    with db._progress_lock:
+        db._pending_progress.clear()
+        db._pending_sketches.clear()
+
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_record_and_flush, args=(100,)) for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    assert len(db.get_progress_entries("w@example.com")) == 400
+    assert db.get_duration_sketches("w@example.com")["sessions"].count == 400
+    assert db.get_cohort_sketches()["sessions"].count == 400
+
+def test_zero_minute_failure_does_not_move_fatigue_wall():
+    history = [{"minutes": m, "completed": True} for m in (40, 45, 50, 55, 60)]
+    assert recommend_time_range(history)["range"] == [45, 55]
+
+    history.append({"minutes": 0, "completed": False})
+    assert build_duration_sketches(history)["failures"].count == 0
+    assert recommend_time_range(history)["range"] == [45, 55]
+
+def test_failed_sketch_merge_is_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "PROGRESS_DIR", str(tmp_path / "progress"))
+    monkeypatch.setattr(db, "SKETCH_DIR", str(tmp_path / "sketches"))
+    with db._progress_lock:
+        db._pending_progress.clear()
+        db._pending_sketches.clear()
+
+    write_json = db._write_json
+    def failing_write(path, data):
+        raise OSError("disk full")
+    monkeypatch.setattr(db, "_write_json", failing_write)
+
+    db.record_progress({"email": "r@example.com", "subject": "math", "minutes": 40, "completed": True, "date": "2026-01-01"})
+    db.flush_progress()
+    assert db.load_sketches("r@example.com")["sessions"].count == 0
+    assert db.get_duration_sketches("r@example.com")["sessions"].count == 1
+
+    monkeypatch.setattr(db, "_write_json", write_json)
+    db.record_progress({"email": "r@example.com", "subject": "math", "minutes": 50, "completed": True, "date": "2026-01-01"})
+    db.flush_progress()
+    assert db.load_sketches("r@example.com")["sessions"].count == 2
+    assert db.load_sketches(db.COHORT_KEY)["sessions"].count == 2
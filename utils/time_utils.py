@@ -0,0 +1,22 @@
+from datetime import date, datetime
+
+DATE_FORMAT = "%Y-%m-%d"
+
+def today_str():
+    return date.today().strftime(DATE_FORMAT)
+
+def now_iso():
+    return datetime.now().isoformat(timespec="seconds")
+
+def parse_date(value):
+    """
+    Parses a zero-padded YYYY-MM-DD string. Returns None if it is missing or
+    malformed, so stored dates always compare correctly as strings.
+    """
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.strptime(value, DATE_FORMAT).date()
+    except ValueError:
+        return None
+    return parsed if parsed.strftime(DATE_FORMAT) == value else None